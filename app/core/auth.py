@@ -83,3 +83,11 @@ def is_token_expired(token: str) -> bool:
     except InvalidTokenError:
         return True
 
+
+async def get_current_admin(current_user: Annotated[UserInDB, Depends(get_current_user)]):
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required",
+        )
+    return current_user
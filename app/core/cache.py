@@ -0,0 +1,28 @@
+from fastapi import Response
+
+
+def cache_control(
+        max_age: int = 0,
+        private: bool = True,
+        stale_while_revalidate: int | None = None,
+        no_cache: bool = False,
+):
+    """Build a route dependency that sets a Cache-Control policy.
+
+    Declare it on a route with ``dependencies=[Depends(cache_control(...))]``.
+    The header is only added to successful responses.
+    """
+    directives = ["private" if private else "public"]
+    if no_cache:
+        directives.append("no-cache")
+    directives.append(f"max-age={max_age}")
+    if stale_while_revalidate is not None:
+        directives.append(f"stale-while-revalidate={stale_while_revalidate}")
+    header_value = ", ".join(directives)
+
+    def set_cache_control(response: Response):
+        response.headers["Cache-Control"] = header_value
+        # Accept-Encoding is added by CompressionMiddleware when it applies.
+        response.headers["Vary"] = "Authorization"
+
+    return set_cache_control
@@ -0,0 +1,74 @@
+from typing import Any
+
+from fastapi import HTTPException, Response
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+from starlette import status
+
+
+def make_etag(version: int) -> str:
+    # Row versions change on every write, so they are strong validators.
+    return f'"{version}"'
+
+
+def set_etag(response: Response, version: int) -> None:
+    response.headers["ETag"] = make_etag(version)
+
+
+def parse_if_match(if_match: str | None) -> int | None:
+    if if_match is None or if_match.strip() == "*":
+        return None
+    value = if_match.strip()
+    if value.startswith("W/"):
+        # If-Match uses strong comparison, so a weak tag never matches.
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Resource was modified by another request",
+        )
+    value = value.strip('"')
+    try:
+        return int(value)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid If-Match header",
+        )
+
+
+def conditional_update(
+        session: Session,
+        model: Any,
+        object_id: int,
+        values: dict,
+        expected_version: int | None = None,
+):
+    """Update a row in a single UPDATE ... RETURNING round trip.
+
+    The version column is always bumped; when ``expected_version`` is given the
+    row is only updated if it still carries that version. Returns the updated
+    object, or ``None`` if no row matched. Constraint violations become 409.
+    """
+    statement = update(model).where(model.id == object_id)
+    if expected_version is not None:
+        statement = statement.where(model.version == expected_version)
+    statement = statement.values(**values, version=model.version + 1).returning(model)
+    try:
+        return session.exec(statement).scalars().first()
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Update conflicts with an existing resource",
+        )
+
+
+def raise_update_failed(session: Session, model: Any, object_id: int, not_found_detail: str):
+    """Tell apart a missing row from a stale version after a failed update."""
+    existing = session.exec(select(model.id).where(model.id == object_id)).first()
+    if existing is not None:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Resource was modified by another request",
+        )
+    raise HTTPException(status_code=404, detail=not_found_detail)
@@ -0,0 +1,145 @@
+import csv
+import threading
+import time
+from bisect import bisect_right
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import IO
+
+from sqlmodel import Session, select
+
+from app.models.exchange_rates import BASE_CURRENCY, ExchangeRate
+
+# Currencies replaced by the euro keep their irrevocable conversion rate, so
+# legacy accounts convert even when the imported table has no row for them.
+FIXED_RATES = {
+    "HRK": Decimal("7.53450"),
+}
+
+CENT = Decimal("0.01")
+
+
+class ExchangeRateCache:
+    """In-memory copy of the exchange-rate table, indexed by date.
+
+    Rates are loaded from the database and reloaded once they are older than
+    ``max_age_seconds``, so imports made by another process show up without a
+    restart. Lookups use a binary search over the sorted dates and return the
+    latest rates published on or before the requested day.
+    """
+
+    def __init__(self, max_age_seconds: float = 300) -> None:
+        self.max_age_seconds = max_age_seconds
+        self._dates: list[date] = []
+        self._rates: dict[date, dict[str, Decimal]] = {}
+        self._loaded_at: float | None = None
+        self._lock = threading.Lock()
+
+    def load(self, session: Session) -> None:
+        rates: dict[date, dict[str, Decimal]] = {}
+        for row in session.exec(select(ExchangeRate)).all():
+            rates.setdefault(row.rate_date, {})[row.currency] = Decimal(row.rate)
+        with self._lock:
+            self._rates = rates
+            self._dates = sorted(rates)
+            self._loaded_at = time.monotonic()
+
+    def ensure_loaded(self, session: Session) -> None:
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at >= self.max_age_seconds:
+            self.load(session)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = None
+
+    def rates_on(self, on: date) -> tuple[date, dict[str, Decimal]]:
+        index = bisect_right(self._dates, on) - 1
+        if index < 0:
+            return on, {BASE_CURRENCY: Decimal(1), **FIXED_RATES}
+        rate_date = self._dates[index]
+        return rate_date, {BASE_CURRENCY: Decimal(1), **FIXED_RATES, **self._rates[rate_date]}
+
+
+exchange_rates = ExchangeRateCache()
+
+
+def convert_totals(
+        totals: dict[str, Decimal],
+        target_currency: str,
+        rates: dict[str, Decimal],
+) -> dict[str, Decimal]:
+    """Convert per-currency totals into ``target_currency``.
+
+    Raises ``ValueError`` naming the first currency without a known rate.
+    """
+    missing = sorted({target_currency, *totals} - rates.keys())
+    if missing:
+        raise ValueError(f"No exchange rate for {missing[0]}")
+    target_rate = rates[target_currency]
+    return {
+        currency: (amount / rates[currency] * target_rate).quantize(CENT)
+        for currency, amount in totals.items()
+    }
+
+
+def read_exchange_rates(file: IO[str]) -> list[tuple[date, str, Decimal]]:
+    """Parse ``date,currency,rate`` CSV rows, rejecting malformed or non-positive rates."""
+    rows = []
+    for line, row in enumerate(csv.DictReader(file), start=2):
+        try:
+            rate_date = date.fromisoformat(row["date"])
+            currency = row["currency"].strip().upper()
+            rate = Decimal(row["rate"])
+        except (KeyError, TypeError, ValueError, InvalidOperation):
+            raise ValueError(f"Invalid exchange rate on line {line}")
+        if len(currency) != 3 or not currency.isalpha():
+            raise ValueError(f"Invalid currency {currency!r} on line {line}")
+        if not rate.is_finite() or rate <= 0:
+            raise ValueError(f"Exchange rate must be positive on line {line}")
+        rows.append((rate_date, currency, rate))
+    return rows
+
+
+def import_exchange_rates(session: Session, source: str | Path | IO[str]) -> int:
+    """Load rates from a CSV file path or text stream with ``date,currency,rate`` columns.
+
+    Existing rows for the same date and currency are overwritten. Returns the
+    number of rows read; raises ``ValueError`` without importing anything if
+    any row is invalid.
+    """
+    if isinstance(source, (str, Path)):
+        with open(source, newline="") as file:
+            rows = read_exchange_rates(file)
+    else:
+        rows = read_exchange_rates(source)
+    if not rows:
+        return 0
+
+    dates = {rate_date for rate_date, _, _ in rows}
+    existing = {
+        (rate.rate_date, rate.currency): rate
+        for rate in session.exec(select(ExchangeRate).where(ExchangeRate.rate_date.in_(dates))).all()
+    }
+    for rate_date, currency, value in rows:
+        rate = existing.get((rate_date, currency))
+        if rate is None:
+            rate = ExchangeRate(rate_date=rate_date, currency=currency, rate=value)
+            existing[(rate_date, currency)] = rate
+        else:
+            rate.rate = value
+        session.add(rate)
+    session.commit()
+    exchange_rates.invalidate()
+    return len(rows)
+
+
+if __name__ == "__main__":
+    import sys
+
+    from app.db import create_db_and_tables, engine
+
+    create_db_and_tables()
+    with Session(engine) as db_session:
+        print(f"Imported {import_exchange_rates(db_session, sys.argv[1])} exchange rates")
@@ -0,0 +1,255 @@
+import hashlib
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import jwt
+from jwt import InvalidTokenError
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.auth import ALGORITHM, SECRET_KEY
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+
+
+@dataclass
+class IdempotencyRecord:
+    fingerprint: str
+    status_code: int | None = None
+    headers: list[tuple[bytes, bytes]] = field(default_factory=list)
+    body: bytes = b""
+
+    @property
+    def completed(self) -> bool:
+        return self.status_code is not None
+
+
+class IdempotencyBackend(ABC):
+    """Storage for idempotency records.
+
+    A shared backend (e.g. Redis) implements these four methods; ``add`` must
+    be atomic so that two concurrent requests cannot both claim the same key.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> IdempotencyRecord | None:
+        ...
+
+    @abstractmethod
+    def add(self, key: str, record: IdempotencyRecord) -> bool:
+        """Store the record only if the key is free; return whether it was stored."""
+
+    @abstractmethod
+    def set(self, key: str, record: IdempotencyRecord) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+
+class InMemoryIdempotencyStore(IdempotencyBackend):
+    """Bounded in-process store; evicts expired entries, then the oldest ones."""
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float = 24 * 60 * 60) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, IdempotencyRecord]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_live(self, key: str) -> IdempotencyRecord | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, record = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        return record
+
+    def _store(self, key: str, record: IdempotencyRecord) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, record)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> IdempotencyRecord | None:
+        with self._lock:
+            return self._get_live(key)
+
+    def add(self, key: str, record: IdempotencyRecord) -> bool:
+        with self._lock:
+            if self._get_live(key) is not None:
+                return False
+            self._store(key, record)
+            return True
+
+    def set(self, key: str, record: IdempotencyRecord) -> None:
+        with self._lock:
+            self._store(key, record)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class IdempotencyMiddleware:
+    """Replay stored responses for POST requests carrying an Idempotency-Key.
+
+    Keys are scoped to the user named in a valid bearer token, so they survive
+    token refreshes. Requests without a valid token, and routes under
+    ``excluded_prefixes`` (which hand out credentials), pass through
+    untouched. The first request with a key runs normally
+    and its response is stored; retries with the same key and payload get the
+    stored response without reaching the routes. Reusing a key with a
+    different payload returns 422, and retrying while the first request is
+    still running returns 409. Server errors and responses setting cookies
+    are not stored.
+    """
+
+    def __init__(
+            self,
+            app: ASGIApp,
+            backend: IdempotencyBackend | None = None,
+            methods=("POST",),
+            excluded_prefixes=("/auth",),
+    ) -> None:
+        self.app = app
+        self.backend = backend if backend is not None else InMemoryIdempotencyStore()
+        self.methods = set(methods)
+        self.excluded_prefixes = tuple(excluded_prefixes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+                scope["type"] != "http"
+                or scope["method"] not in self.methods
+                or scope["path"].startswith(self.excluded_prefixes)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get(IDEMPOTENCY_HEADER)
+        owner = self._token_subject(headers.get("authorization", "")) if idempotency_key else None
+        if owner is None:
+            await self.app(scope, receive, send)
+            return
+
+        body, more_messages = await self._read_body(receive)
+        key = self._storage_key(idempotency_key, owner)
+        fingerprint = self._fingerprint(scope, body)
+
+        record = IdempotencyRecord(fingerprint=fingerprint)
+        if not self.backend.add(key, record):
+            existing = self.backend.get(key)
+            if existing is not None:
+                await self._respond_to_existing(existing, fingerprint, send)
+                return
+            self.backend.set(key, record)
+
+        async def replay_receive() -> Message:
+            if more_messages:
+                return more_messages.pop(0)
+            return await receive()
+
+        status_code = 500
+        response_headers: list[tuple[bytes, bytes]] = []
+        chunks: list[bytes] = []
+
+        async def capture_send(message: Message) -> None:
+            nonlocal status_code, response_headers
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                response_headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        completed = False
+        try:
+            await self.app(scope, replay_receive, capture_send)
+            if status_code < 500 and not any(name.lower() == b"set-cookie" for name, _ in response_headers):
+                record.status_code = status_code
+                record.headers = response_headers
+                record.body = b"".join(chunks)
+                self.backend.set(key, record)
+                completed = True
+        finally:
+            # Errors, cancellations and uncacheable responses free the key
+            # so the client can retry instead of getting 409 until it expires.
+            if not completed:
+                self.backend.delete(key)
+
+    @staticmethod
+    async def _read_body(receive: Receive) -> tuple[bytes, list[Message]]:
+        chunks = []
+        messages = []
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks), messages
+
+    @staticmethod
+    def _token_subject(authorization: str) -> str | None:
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() != "bearer" or not token.strip():
+            return None
+        try:
+            payload = jwt.decode(token.strip(), SECRET_KEY, algorithms=[ALGORITHM])
+        except InvalidTokenError:
+            return None
+        subject = payload.get("sub")
+        return subject if isinstance(subject, str) and subject else None
+
+    @staticmethod
+    def _storage_key(idempotency_key: str, owner: str) -> str:
+        owner_hash = hashlib.sha256(owner.encode()).hexdigest()
+        return f"{owner_hash}:{idempotency_key}"
+
+    @staticmethod
+    def _fingerprint(scope: Scope, body: bytes) -> str:
+        digest = hashlib.sha256()
+        digest.update(scope["method"].encode())
+        digest.update(scope["path"].encode())
+        digest.update(scope.get("query_string", b""))
+        digest.update(body)
+        return digest.hexdigest()
+
+    @staticmethod
+    async def _respond_to_existing(record: IdempotencyRecord, fingerprint: str, send: Send) -> None:
+        if record.fingerprint != fingerprint:
+            await _send_error(send, 422, "Idempotency-Key was already used with a different request")
+        elif not record.completed:
+            await _send_error(send, 409, "A request with this Idempotency-Key is still being processed")
+        else:
+            await send({
+                "type": "http.response.start",
+                "status": record.status_code,
+                "headers": record.headers + [(b"idempotent-replayed", b"true")],
+            })
+            await send({"type": "http.response.body", "body": record.body})
+
+
+async def _send_error(send: Send, status_code: int, detail: str) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
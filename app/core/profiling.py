@@ -0,0 +1,274 @@
+import asyncio
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict, deque
+from contextvars import Context, ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+PROFILE_HEADER = "x-profile"
+
+# Requests that match no route share one bucket, so random paths cannot use
+# up the per-route retention slots.
+UNMATCHED_ROUTE = "<unmatched>"
+
+TRUNCATED_STACK = "[truncated]"
+
+# Innermost frames in these files mean the thread is waiting for work, so the
+# sample says nothing about the request being profiled.
+_IDLE_FILES = ("threading.py", "selectors.py", "queue.py")
+
+
+@dataclass
+class ProfilingSettings:
+    enabled: bool = False
+    sample_rate: float = 0.0
+    interval_ms: float = 5.0
+    max_profiles_per_route: int = 20
+    max_routes: int = 100
+    max_concurrent_profiles: int = 1
+    max_stacks_per_profile: int = 2000
+    header_token: str | None = None
+
+
+@dataclass
+class Profile:
+    id: str
+    route: str
+    method: str
+    status_code: int
+    duration_ms: float
+    samples: int
+    stacks: Counter
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    def collapsed(self) -> str:
+        """Stacks in the collapsed format read by flamegraph.pl and speedscope."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """Keeps the latest profiles of each route, dropping the oldest first."""
+
+    def __init__(self, max_profiles_per_route: int = 20, max_routes: int = 100) -> None:
+        self.max_profiles_per_route = max_profiles_per_route
+        self.max_routes = max_routes
+        self._routes: OrderedDict[str, deque[Profile]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile: Profile) -> None:
+        key = f"{profile.method} {profile.route}"
+        with self._lock:
+            profiles = self._routes.get(key)
+            if profiles is None or profiles.maxlen != self.max_profiles_per_route:
+                profiles = deque(profiles or (), maxlen=self.max_profiles_per_route)
+                self._routes[key] = profiles
+            profiles.append(profile)
+            self._routes.move_to_end(key)
+            while len(self._routes) > self.max_routes:
+                self._routes.popitem(last=False)
+
+    def list(self) -> list[Profile]:
+        with self._lock:
+            return [profile for profiles in self._routes.values() for profile in profiles]
+
+    def get(self, profile_id: str) -> Profile | None:
+        return next((profile for profile in self.list() if profile.id == profile_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+_current_collector: ContextVar["ProfileCollector | None"] = ContextVar("profile_collector", default=None)
+
+# A worker thread runs the request's code inside a copy of the request's
+# context, held by one of the outermost frames of its run loop.
+_WORKER_CONTEXT_DEPTH = 8
+
+
+class ProfileCollector:
+    """Samples gathered for one profiled request, capped at ``max_stacks`` distinct stacks.
+
+    ``loop_thread_id``, ``loop`` and ``task`` identify the request on the event
+    loop; worker threads are matched through the context they run.
+    """
+
+    def __init__(self, max_stacks: int, loop_thread_id: int | None = None,
+                 loop: asyncio.AbstractEventLoop | None = None, task: asyncio.Task | None = None) -> None:
+        self.max_stacks = max_stacks
+        self.loop_thread_id = loop_thread_id
+        self.loop = loop
+        self.task = task
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+    def add(self, stacks: list[str]) -> None:
+        self.samples += 1
+        for stack in stacks:
+            self.add_stack(stack)
+
+    def add_stack(self, stack: str) -> None:
+        if stack not in self.stacks and len(self.stacks) >= self.max_stacks:
+            stack = TRUNCATED_STACK
+        self.stacks[stack] += 1
+
+
+class SamplingProfiler:
+    """One long-lived background thread that samples for every profiled request.
+
+    The thread sleeps while no request is being profiled. Each tick reads the
+    stacks of all threads once and records, for every active collector, only
+    the threads working for its request: the event loop thread while the
+    request's task is running, and worker threads running a sync route or
+    dependency in the request's context. At most ``max_concurrent_profiles``
+    requests are profiled at a time.
+    """
+
+    def __init__(self, settings: ProfilingSettings) -> None:
+        self.settings = settings
+        self._active: set[ProfileCollector] = set()
+        self._condition = threading.Condition()
+        self._thread: threading.Thread | None = None
+
+    def begin(self, loop_thread_id: int | None = None, loop: asyncio.AbstractEventLoop | None = None,
+              task: asyncio.Task | None = None) -> ProfileCollector | None:
+        """Start collecting for a request, or return ``None`` if too many are running."""
+        with self._condition:
+            if len(self._active) >= self.settings.max_concurrent_profiles:
+                return None
+            collector = ProfileCollector(self.settings.max_stacks_per_profile, loop_thread_id, loop, task)
+            self._active.add(collector)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+            return collector
+
+    def end(self, collector: ProfileCollector) -> None:
+        with self._condition:
+            self._active.discard(collector)
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while True:
+            with self._condition:
+                while not self._active:
+                    self._condition.wait()
+            time.sleep(self.settings.interval_ms / 1000)
+            with self._condition:
+                self.sample(own_id)
+
+    def sample(self, own_id: int | None = None) -> None:
+        collectors = list(self._active)
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id or os.path.basename(frame.f_code.co_filename) in _IDLE_FILES:
+                continue
+            collector = _owning_collector(thread_id, frame, collectors)
+            if collector is not None:
+                collector.add_stack(collapse_stack(frame))
+        for collector in collectors:
+            collector.samples += 1
+
+
+def _owning_collector(thread_id: int, frame, collectors: list[ProfileCollector]) -> ProfileCollector | None:
+    loop_collectors = [collector for collector in collectors if collector.loop_thread_id == thread_id]
+    if loop_collectors:
+        task = asyncio.current_task(loop_collectors[0].loop)
+        return next((collector for collector in loop_collectors if collector.task is task), None)
+
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    for outer_frame in reversed(frames[-_WORKER_CONTEXT_DEPTH:]):
+        for value in outer_frame.f_locals.values():
+            if isinstance(value, Context):
+                collector = value.get(_current_collector)
+                return collector if collector in collectors else None
+    return None
+
+
+def collapse_stack(frame) -> str:
+    """One stack in collapsed form, outermost frame first."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class ProfilingMiddleware:
+    """Profile a fraction of requests, or those sent with the admin's profile token.
+
+    Profiling is off until enabled through the admin routes; while off the
+    middleware only checks a flag. The ``X-Profile`` header is only honoured
+    when it carries the token set through ``PUT /admin/profiling``.
+    """
+
+    def __init__(self, app: ASGIApp, settings: ProfilingSettings, store: ProfileStore,
+                 profiler: SamplingProfiler) -> None:
+        self.app = app
+        self.settings = settings
+        self.store = store
+        self.profiler = profiler
+
+    def _should_profile(self, scope: Scope) -> bool:
+        token = self.settings.header_token
+        header = Headers(scope=scope).get(PROFILE_HEADER)
+        if token and header and hmac.compare_digest(header.encode(), token.encode()):
+            return True
+        return random.random() < self.settings.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.settings.enabled or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        collector = self.profiler.begin(threading.get_ident(), asyncio.get_running_loop(), asyncio.current_task())
+        if collector is None:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        token = _current_collector.set(collector)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _current_collector.reset(token)
+            self.profiler.end(collector)
+            route = scope.get("route")
+            self.store.add(Profile(
+                id=uuid.uuid4().hex,
+                route=getattr(route, "path", UNMATCHED_ROUTE),
+                method=scope["method"],
+                status_code=status_code,
+                duration_ms=(time.perf_counter() - started) * 1000,
+                samples=collector.samples,
+                stacks=collector.stacks,
+            ))
+
+
+profiling_settings = ProfilingSettings()
+profile_store = ProfileStore(
+    max_profiles_per_route=profiling_settings.max_profiles_per_route,
+    max_routes=profiling_settings.max_routes,
+)
+sampling_profiler = SamplingProfiler(profiling_settings)
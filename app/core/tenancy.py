@@ -0,0 +1,71 @@
+from functools import cache, lru_cache
+
+from fastapi import Depends
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, with_loader_criteria
+from sqlmodel import Session, SQLModel
+
+from app.core.auth import get_current_user
+from app.db import get_session
+from app.models.auth import UserInDB, UserOwned
+
+TENANT_KEY = "tenant_user_id"
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _scope_statements_to_tenant(execute_state: ORMExecuteState):
+    user_id = execute_state.session.info.get(TENANT_KEY)
+    if user_id is None:
+        return
+    if not (execute_state.is_select or execute_state.is_update or execute_state.is_delete):
+        return
+    if execute_state.is_column_load or execute_state.is_relationship_load:
+        return
+    execute_state.statement = execute_state.statement.options(*_tenant_criteria(user_id))
+
+
+@cache
+def _user_owned_models() -> tuple[type[UserOwned], ...]:
+    # Resolved on the first scoped statement, once every model has been mapped.
+    return tuple(
+        mapper.class_ for mapper in SQLModel._sa_registry.mappers
+        if issubclass(mapper.class_, UserOwned)
+    )
+
+
+@lru_cache(maxsize=1024)
+def _tenant_criteria(user_id: int) -> tuple:
+    return tuple(
+        with_loader_criteria(model, lambda cls: cls.user_id == user_id, include_aliases=True)
+        for model in _user_owned_models()
+    )
+
+
+@event.listens_for(Session, "before_flush")
+def _assign_tenant_to_new_rows(session: Session, flush_context, instances):
+    user_id = session.info.get(TENANT_KEY)
+    if user_id is None:
+        return
+    for instance in session.new:
+        if not isinstance(instance, UserOwned):
+            continue
+        if instance.user_id is None:
+            instance.user_id = user_id
+        elif instance.user_id != user_id:
+            raise PermissionError("Cannot write rows owned by another user")
+
+
+def get_tenant_session(
+        session: Session = Depends(get_session),
+        current_user: UserInDB = Depends(get_current_user)
+):
+    """Session scoped to the current user.
+
+    Every ORM select, update and delete on a ``UserOwned`` table gets a
+    ``user_id`` filter, and new rows are assigned to the current user.
+    """
+    session.info[TENANT_KEY] = current_user.id
+    try:
+        yield session
+    finally:
+        session.info.pop(TENANT_KEY, None)
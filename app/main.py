@@ -2,8 +2,11 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
+from app.core.compression import CompressionMiddleware
+from app.core.idempotency import IdempotencyMiddleware, InMemoryIdempotencyStore
+from app.core.profiling import ProfilingMiddleware, profile_store, profiling_settings, sampling_profiler
 from app.db import create_db_and_tables
-from app.routers import expenses_category, auth, accounts
+from app.routers import expenses_category, auth, accounts, admin
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
@@ -14,9 +17,16 @@ async def lifespan(_: FastAPI):
 
 app = FastAPI(lifespan=lifespan)
 
+# Middleware added last runs first: profiles cover only the app itself,
+# replies are stored uncompressed and compressed per request on the way out.
+app.add_middleware(ProfilingMiddleware, settings=profiling_settings, store=profile_store, profiler=sampling_profiler)
+app.add_middleware(IdempotencyMiddleware, backend=InMemoryIdempotencyStore(max_entries=10_000, ttl_seconds=24 * 60 * 60))
+app.add_middleware(CompressionMiddleware, minimum_size=500)
+
 # Include your routers here
 app.include_router(expenses_category.router)
 app.include_router(auth.router)
 app.include_router(accounts.router)
+app.include_router(admin.router)
 
 
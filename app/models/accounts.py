@@ -2,27 +2,40 @@ from datetime import datetime
 from decimal import Decimal
 from typing import Optional
 
+from pydantic import field_validator
 from sqlmodel import SQLModel, Field
 
+from app.models.auth import UserOwned
+
 class AccountBase(SQLModel):
     account_number: str = Field(..., max_length=20, unique=True)
     account_nickname: Optional[str] = Field(default=None, max_length=200)
     balance: Decimal = Field(default=0.00)
+    currency: str = Field(default="EUR", max_length=3, regex="^[A-Z]{3}$")
 
-class Account(AccountBase, table=True):
+class Account(AccountBase, UserOwned, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: int = Field(foreign_key="userindb.id")
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    version: int = Field(default=1, nullable=False)
 
 class AccountCreate(AccountBase):
     pass
 
 class AccountUpdate(AccountCreate):
-    account_nickname: Optional[str] = None
+    account_nickname: Optional[str] = Field(default=None, max_length=200)
     balance: Optional[Decimal] = None
-    account_number: Optional[str] = None
+    account_number: Optional[str] = Field(default=None, max_length=20)
+    currency: Optional[str] = Field(default=None, max_length=3, regex="^[A-Z]{3}$")
+
+    @field_validator("account_number", "balance", "currency")
+    @classmethod
+    def reject_null(cls, value):
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
 
 class AccountsRead(AccountBase):
     user_id: int = Field(foreign_key="userindb.id")
     created_at: datetime = Field(default_factory=datetime.utcnow)
     id: int
+    version: int
@@ -21,4 +21,14 @@ class UserCreate(User):
 
 class UserInDB(User, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    hashed_password: str
\ No newline at end of file
+    hashed_password: str
+    is_admin: bool = Field(default=False)
+
+
+class UserOwned(SQLModel):
+    """Base for tables whose rows belong to a single user.
+
+    Sessions bound to a user through ``app.core.tenancy`` only ever see and
+    write rows of that user.
+    """
+    user_id: int = Field(foreign_key="userindb.id", index=True)
@@ -0,0 +1,35 @@
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import UniqueConstraint
+from sqlmodel import SQLModel, Field
+
+BASE_CURRENCY = "EUR"
+
+
+class ExchangeRate(SQLModel, table=True):
+    """Units of ``currency`` per one unit of the base currency (EUR) on ``rate_date``."""
+    __table_args__ = (UniqueConstraint("rate_date", "currency"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    rate_date: date = Field(index=True)
+    currency: str = Field(max_length=3, index=True)
+    rate: Decimal = Field(max_digits=18, decimal_places=8)
+
+
+class CurrencyTotal(SQLModel):
+    currency: str
+    balance: Decimal
+    converted_balance: Decimal
+
+
+class NetWorthRead(SQLModel):
+    currency: str
+    rate_date: date
+    total: Decimal
+    by_currency: list[CurrencyTotal]
+
+
+class ExchangeRateImportRead(SQLModel):
+    imported: int
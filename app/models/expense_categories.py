@@ -1,6 +1,10 @@
 from typing import Optional
+
+from pydantic import field_validator
 from sqlmodel import SQLModel, Field
 
+from app.models.auth import UserOwned
+
 
 class ExpensesCategoryBase(SQLModel):
     name: str
@@ -13,10 +17,19 @@ class ExpensesCategoryCreate(ExpensesCategoryBase):
 
 class ExpensesCategoryRead(ExpensesCategoryBase):
     id: int
+    version: int
 
 class ExpensesCategoryUpdate(SQLModel):
     name: Optional[str] = None
     description: Optional[str] = None
 
-class ExpensesCategory(ExpensesCategoryBase, table=True):
+    @field_validator("name")
+    @classmethod
+    def reject_null(cls, value):
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
+
+class ExpensesCategory(ExpensesCategoryBase, UserOwned, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
+    version: int = Field(default=1, nullable=False)
@@ -0,0 +1,47 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import field_validator
+from sqlmodel import SQLModel, Field
+
+
+class ProfilingSettingsRead(SQLModel):
+    enabled: bool
+    sample_rate: float
+    interval_ms: float
+    max_profiles_per_route: int
+    max_routes: int
+    max_concurrent_profiles: int
+    max_stacks_per_profile: int
+    header_token_set: bool
+
+
+class ProfilingSettingsUpdate(SQLModel):
+    enabled: Optional[bool] = None
+    sample_rate: Optional[float] = Field(default=None, ge=0, le=1)
+    interval_ms: Optional[float] = Field(default=None, ge=1, le=1000)
+    max_profiles_per_route: Optional[int] = Field(default=None, ge=1, le=1000)
+    max_routes: Optional[int] = Field(default=None, ge=1, le=10_000)
+    max_concurrent_profiles: Optional[int] = Field(default=None, ge=1, le=16)
+    max_stacks_per_profile: Optional[int] = Field(default=None, ge=1, le=100_000)
+    header_token: Optional[str] = Field(default=None, min_length=16, max_length=200)
+
+    @field_validator(
+        "enabled", "sample_rate", "interval_ms", "max_profiles_per_route", "max_routes",
+        "max_concurrent_profiles", "max_stacks_per_profile",
+    )
+    @classmethod
+    def reject_null(cls, value):
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
+
+
+class ProfileRead(SQLModel):
+    id: str
+    route: str
+    method: str
+    status_code: int
+    duration_ms: float
+    samples: int
+    created_at: datetime
@@ -1,14 +1,16 @@
-from typing import Annotated
+from datetime import date
+from decimal import Decimal
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.sql.functions import current_user
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Response
+from sqlmodel import Session, select, func
 
-from app.core.auth import oauth2_scheme, get_current_user
-from app.db import get_session
+from app.core.cache import cache_control
+from app.core.concurrency import conditional_update, parse_if_match, raise_update_failed, set_etag
+from app.core.currency import convert_totals, exchange_rates
+from app.core.tenancy import get_tenant_session
 from app.dependencies import verify_token
-from app.models.accounts import Account, AccountCreate
-from app.models.auth import User
+from app.models.accounts import Account, AccountCreate, AccountUpdate, AccountsRead
+from app.models.exchange_rates import BASE_CURRENCY, CurrencyTotal, NetWorthRead
 
 router = APIRouter(
     prefix="/accounts",
@@ -17,24 +19,84 @@ router = APIRouter(
 )
 
 
-@router.get("/")
-def read_all_user_accounts(session: Session = Depends(get_session),
-                           current_user: User = Depends(get_current_user)):
-    return session.exec(select(Account).where(Account.user_id == current_user.id)).all()
+@router.get("/", dependencies=[Depends(cache_control(max_age=15, stale_while_revalidate=60))])
+def read_all_user_accounts(session: Session = Depends(get_tenant_session)):
+    return session.exec(select(Account)).all()
 
 
 @router.post("/")
 def create_new_account(
     account: AccountCreate,
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    session: Session = Depends(get_tenant_session)
 ):
-    new_account = Account(
-        **account.model_dump(),
-        user_id=current_user.id
-    )
+    new_account = Account(**account.model_dump())
     session.add(new_account)
     session.commit()
     session.refresh(new_account)
     return new_account
 
+
+@router.get("/net-worth", response_model=NetWorthRead,
+            dependencies=[Depends(cache_control(max_age=15, stale_while_revalidate=60))])
+def read_net_worth(
+    currency: str = Query(default=BASE_CURRENCY, pattern="^[A-Z]{3}$"),
+    on: date | None = None,
+    session: Session = Depends(get_tenant_session)
+):
+    rows = session.exec(
+        select(Account.currency, func.sum(Account.balance)).group_by(Account.currency)
+    ).all()
+    totals = {row_currency: Decimal(str(balance or 0)) for row_currency, balance in rows}
+
+    exchange_rates.ensure_loaded(session)
+    rate_date, rates = exchange_rates.rates_on(on or date.today())
+    try:
+        converted = convert_totals(totals, currency, rates)
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error))
+
+    return NetWorthRead(
+        currency=currency,
+        rate_date=rate_date,
+        total=sum(converted.values(), Decimal("0.00")),
+        by_currency=[
+            CurrencyTotal(currency=row_currency, balance=totals[row_currency], converted_balance=amount)
+            for row_currency, amount in sorted(converted.items())
+        ],
+    )
+
+
+@router.get("/{account_id}", response_model=AccountsRead,
+            dependencies=[Depends(cache_control(max_age=15, stale_while_revalidate=60))])
+def read_account(
+    account_id: int,
+    response: Response,
+    session: Session = Depends(get_tenant_session)
+):
+    account = session.exec(select(Account).where(Account.id == account_id)).first()
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+    set_etag(response, account.version)
+    return account
+
+
+@router.put("/{account_id}", response_model=AccountsRead)
+def update_account(
+    account_id: int,
+    data: AccountUpdate,
+    response: Response,
+    if_match: str | None = Header(default=None),
+    session: Session = Depends(get_tenant_session)
+):
+    expected_version = parse_if_match(if_match)
+    data_dict = data.model_dump(exclude_unset=True)
+
+    account = conditional_update(session, Account, account_id, data_dict, expected_version)
+    if account is None:
+        session.rollback()
+        raise_update_failed(session, Account, account_id, "Account not found")
+
+    updated = AccountsRead.model_validate(account)
+    session.commit()
+    set_etag(response, updated.version)
+    return updated
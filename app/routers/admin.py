@@ -0,0 +1,76 @@
+import io
+from dataclasses import replace
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, UploadFile
+from fastapi.responses import PlainTextResponse
+from sqlmodel import Session
+
+from app.core.auth import get_current_admin
+from app.core.currency import import_exchange_rates
+from app.core.profiling import profile_store, profiling_settings
+from app.db import get_session
+from app.dependencies import verify_token
+from app.models.exchange_rates import ExchangeRateImportRead
+from app.models.profiling import ProfileRead, ProfilingSettingsRead, ProfilingSettingsUpdate
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(verify_token), Depends(get_current_admin)]
+)
+
+
+def _settings_read() -> ProfilingSettingsRead:
+    # The header token is write-only; only report whether one is set.
+    return ProfilingSettingsRead(
+        **{key: value for key, value in vars(profiling_settings).items() if key != "header_token"},
+        header_token_set=bool(profiling_settings.header_token),
+    )
+
+
+@router.get("/profiling", response_model=ProfilingSettingsRead)
+def read_profiling_settings():
+    return _settings_read()
+
+
+@router.put("/profiling", response_model=ProfilingSettingsRead)
+def update_profiling_settings(data: ProfilingSettingsUpdate):
+    # Build the complete new settings first so a bad update changes nothing.
+    updated = replace(profiling_settings, **data.model_dump(exclude_unset=True))
+    for key, value in vars(updated).items():
+        setattr(profiling_settings, key, value)
+    profile_store.max_profiles_per_route = profiling_settings.max_profiles_per_route
+    profile_store.max_routes = profiling_settings.max_routes
+    return _settings_read()
+
+
+@router.get("/profiles", response_model=List[ProfileRead])
+def read_profiles():
+    return profile_store.list()
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+def read_profile(profile_id: str):
+    profile = profile_store.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile.collapsed()
+
+
+@router.delete("/profiles")
+def delete_profiles():
+    profile_store.clear()
+    return {"ok": True}
+
+
+@router.post("/exchange-rates", response_model=ExchangeRateImportRead)
+def upload_exchange_rates(file: UploadFile, session: Session = Depends(get_session)):
+    try:
+        content = file.file.read().decode("utf-8-sig")
+        imported = import_exchange_rates(session, io.StringIO(content, newline=""))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=422, detail="Exchange rate file must be UTF-8 encoded")
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error))
+    return ExchangeRateImportRead(imported=imported)
@@ -1,9 +1,11 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Header, Response
 from sqlmodel import Session, select
 
-from app.db import get_session
+from app.core.cache import cache_control
+from app.core.concurrency import conditional_update, parse_if_match, raise_update_failed, set_etag
+from app.core.tenancy import get_tenant_session
 from app.dependencies import verify_token
 from app.models.expense_categories import ExpensesCategoryRead, ExpensesCategoryCreate, ExpensesCategory, \
     ExpensesCategoryUpdate
@@ -15,47 +17,57 @@ router = APIRouter(
 )
 
 
-@router.get("/categories/", response_model=List[ExpensesCategoryRead])
-def read_categories(session: Session = Depends(get_session)):
+@router.get("/categories/", response_model=List[ExpensesCategoryRead],
+            dependencies=[Depends(cache_control(max_age=60, stale_while_revalidate=300))])
+def read_categories(session: Session = Depends(get_tenant_session)):
     return session.exec(select(ExpensesCategory)).all()
 
 
 @router.post("/categories/", response_model=ExpensesCategoryRead)
-def create_category(category: ExpensesCategoryCreate, session: Session = Depends(get_session)):
-    db_category = ExpensesCategory.model_validate(category)
+def create_category(category: ExpensesCategoryCreate, response: Response, session: Session = Depends(get_tenant_session)):
+    db_category = ExpensesCategory(**category.model_dump())
     session.add(db_category)
     session.commit()
     session.refresh(db_category)
+    set_etag(response, db_category.version)
     return db_category
 
 
-@router.get("/categories/{category_id}", response_model=ExpensesCategoryRead)
-def read_category(category_id: int, session: Session = Depends(get_session)):
-    category = session.get(ExpensesCategory, category_id)
+@router.get("/categories/{category_id}", response_model=ExpensesCategoryRead,
+            dependencies=[Depends(cache_control(max_age=60, stale_while_revalidate=300))])
+def read_category(category_id: int, response: Response, session: Session = Depends(get_tenant_session)):
+    category = session.exec(select(ExpensesCategory).where(ExpensesCategory.id == category_id)).first()
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
+    set_etag(response, category.version)
     return category
 
 
 @router.put("/categories/{category_id}", response_model=ExpensesCategoryRead)
-def update_category(category_id: int, data: ExpensesCategoryUpdate, session: Session = Depends(get_session)):
-    category = session.get(ExpensesCategory, category_id)
-    if not category:
-        raise HTTPException(status_code=404, detail="Category not found")
-
+def update_category(
+    category_id: int,
+    data: ExpensesCategoryUpdate,
+    response: Response,
+    if_match: str | None = Header(default=None),
+    session: Session = Depends(get_tenant_session)
+):
+    expected_version = parse_if_match(if_match)
     data_dict = data.model_dump(exclude_unset=True)
-    for key, value in data_dict.items():
-        setattr(category, key, value)
 
-    session.add(category)
+    category = conditional_update(session, ExpensesCategory, category_id, data_dict, expected_version)
+    if category is None:
+        session.rollback()
+        raise_update_failed(session, ExpensesCategory, category_id, "Category not found")
+
+    updated = ExpensesCategoryRead.model_validate(category)
     session.commit()
-    session.refresh(category)
-    return category
+    set_etag(response, updated.version)
+    return updated
 
 
 @router.delete("/categories/{category_id}")
-def delete_category(category_id: int, session: Session = Depends(get_session)):
-    category = session.get(ExpensesCategory, category_id)
+def delete_category(category_id: int, session: Session = Depends(get_tenant_session)):
+    category = session.exec(select(ExpensesCategory).where(ExpensesCategory.id == category_id)).first()
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     session.delete(category)
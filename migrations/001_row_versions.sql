@@ -0,0 +1,12 @@
+-- Adds the row version used for optimistic locking to accounts and expense
+-- categories. create_all on startup does not alter existing tables.
+--
+-- Run once against PostgreSQL, before starting the new version:
+--   psql -h localhost -U admin -d homebudgetapi_db -f migrations/001_row_versions.sql
+
+BEGIN;
+
+ALTER TABLE account ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE expensescategory ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+
+COMMIT;
@@ -0,0 +1,23 @@
+-- Adds the currency of each account. Existing accounts are assumed to be in
+-- EUR. The exchangerate table is created by create_all on startup; if an
+-- earlier build already created it, its (rate_date, currency) unique
+-- constraint is added here.
+--
+-- Run once against PostgreSQL, before starting the new version:
+--   psql -h localhost -U admin -d homebudgetapi_db -f migrations/002_account_currency.sql
+
+BEGIN;
+
+ALTER TABLE account ADD COLUMN IF NOT EXISTS currency VARCHAR(3) NOT NULL DEFAULT 'EUR';
+
+DO $$
+BEGIN
+    IF to_regclass('exchangerate') IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conrelid = 'exchangerate'::regclass AND contype = 'u'
+    ) THEN
+        ALTER TABLE exchangerate ADD CONSTRAINT exchangerate_rate_date_currency_key UNIQUE (rate_date, currency);
+    END IF;
+END $$;
+
+COMMIT;
@@ -0,0 +1,28 @@
+-- Makes expense categories belong to a user and indexes the user_id columns
+-- used by the tenant-scoped session.
+--
+-- Expense categories used to be shared by every user. Each existing user gets
+-- a private copy of every shared category, then the ownerless originals are
+-- removed. Nothing else references categories yet, so no rows are orphaned.
+--
+-- Run once against PostgreSQL, before starting the new version:
+--   psql -h localhost -U admin -d homebudgetapi_db -f migrations/003_user_scoped_categories.sql
+
+BEGIN;
+
+CREATE INDEX IF NOT EXISTS ix_account_user_id ON account (user_id);
+
+ALTER TABLE expensescategory ADD COLUMN IF NOT EXISTS user_id INTEGER REFERENCES userindb (id);
+
+INSERT INTO expensescategory (name, description, version, user_id)
+SELECT category.name, category.description, 1, owner.id
+FROM expensescategory AS category
+CROSS JOIN userindb AS owner
+WHERE category.user_id IS NULL;
+
+DELETE FROM expensescategory WHERE user_id IS NULL;
+
+ALTER TABLE expensescategory ALTER COLUMN user_id SET NOT NULL;
+CREATE INDEX IF NOT EXISTS ix_expensescategory_user_id ON expensescategory (user_id);
+
+COMMIT;
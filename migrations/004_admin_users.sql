@@ -0,0 +1,12 @@
+-- Adds the admin flag checked by the /admin routes. Existing users are not
+-- admins; promote one with:
+--   UPDATE userindb SET is_admin = TRUE WHERE email = '...';
+--
+-- Run once against PostgreSQL, before starting the new version:
+--   psql -h localhost -U admin -d homebudgetapi_db -f migrations/004_admin_users.sql
+
+BEGIN;
+
+ALTER TABLE userindb ADD COLUMN IF NOT EXISTS is_admin BOOLEAN NOT NULL DEFAULT FALSE;
+
+COMMIT;
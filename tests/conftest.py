@@ -1,4 +1,6 @@
 # conftest.py
+from datetime import timedelta
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import SQLModel, Session, create_engine
@@ -54,3 +56,11 @@ def test_user_fixture(session: Session):
     session.refresh(user)
     return user
 
+
+@pytest.fixture(name="auth_headers")
+def auth_headers_fixture(test_user: UserInDB):
+    """Create authorization headers for the test user"""
+    from app.core.auth import create_access_token
+
+    token = create_access_token({"sub": test_user.email}, timedelta(minutes=30))
+    return {"Authorization": f"Bearer {token}"}
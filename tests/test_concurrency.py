@@ -0,0 +1,167 @@
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.core.concurrency import make_etag, parse_if_match
+
+
+class TestETagHelpers:
+    """Test ETag and If-Match helpers"""
+
+    def test_parse_if_match(self):
+        """Test parsing strong and wildcard If-Match values"""
+        assert parse_if_match(make_etag(3)) == 3
+        assert parse_if_match('"7"') == 7
+        assert parse_if_match("*") is None
+        assert parse_if_match(None) is None
+
+    def test_weak_etag_never_matches(self):
+        """Test that If-Match uses strong comparison"""
+        with pytest.raises(HTTPException) as error:
+            parse_if_match('W/"3"')
+        assert error.value.status_code == 412
+
+
+class TestCategoryConditionalUpdate:
+    """Test optimistic locking on expense categories"""
+
+    def test_update_bumps_version(self, client: TestClient, auth_headers):
+        """Test that an update increments the version and returns an ETag"""
+        created = client.post("/expenses/categories/", json={"name": "Food"}, headers=auth_headers)
+        assert created.status_code == 200
+        category = created.json()
+        assert category["version"] == 1
+
+        response = client.put(
+            f"/expenses/categories/{category['id']}",
+            json={"description": "Groceries"},
+            headers={**auth_headers, "If-Match": created.headers["ETag"]},
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["version"] == 2
+        assert data["name"] == "Food"
+        assert data["description"] == "Groceries"
+        assert response.headers["ETag"] == make_etag(2)
+
+    def test_stale_if_match_fails(self, client: TestClient, auth_headers):
+        """Test that a concurrent edit with a stale version is rejected"""
+        category = client.post("/expenses/categories/", json={"name": "Rent"}, headers=auth_headers).json()
+        etag = make_etag(category["version"])
+
+        first = client.put(
+            f"/expenses/categories/{category['id']}",
+            json={"name": "Housing"},
+            headers={**auth_headers, "If-Match": etag},
+        )
+        second = client.put(
+            f"/expenses/categories/{category['id']}",
+            json={"name": "Lodging"},
+            headers={**auth_headers, "If-Match": etag},
+        )
+
+        assert first.status_code == 200
+        assert second.status_code == 412
+        current = client.get(f"/expenses/categories/{category['id']}", headers=auth_headers)
+        assert current.json()["name"] == "Housing"
+        assert current.headers["ETag"] == make_etag(2)
+
+    def test_update_missing_category(self, client: TestClient, auth_headers):
+        """Test updating a nonexistent category"""
+        response = client.put("/expenses/categories/999", json={"name": "Nope"}, headers=auth_headers)
+        assert response.status_code == 404
+
+
+class TestAccountConditionalUpdate:
+    """Test optimistic locking on accounts"""
+
+    def test_update_account(self, client: TestClient, auth_headers):
+        """Test updating an account with a matching version"""
+        account = client.post(
+            "/accounts/", json={"account_number": "HR123", "balance": "10.00"}, headers=auth_headers
+        ).json()
+
+        response = client.put(
+            f"/accounts/{account['id']}",
+            json={"account_nickname": "Main"},
+            headers={**auth_headers, "If-Match": make_etag(account["version"])},
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["account_nickname"] == "Main"
+        assert data["account_number"] == "HR123"
+        assert data["version"] == 2
+
+    def test_stale_account_update_fails(self, client: TestClient, auth_headers):
+        """Test that a stale account version is rejected"""
+        account = client.post("/accounts/", json={"account_number": "HR456"}, headers=auth_headers).json()
+        client.put(f"/accounts/{account['id']}", json={"balance": "5.00"}, headers=auth_headers)
+
+        response = client.put(
+            f"/accounts/{account['id']}",
+            json={"balance": "7.00"},
+            headers={**auth_headers, "If-Match": make_etag(1)},
+        )
+
+        assert response.status_code == 412
+
+    def test_update_missing_account(self, client: TestClient, auth_headers):
+        """Test updating an account that does not exist"""
+        response = client.put("/accounts/999", json={"account_nickname": "Ghost"}, headers=auth_headers)
+        assert response.status_code == 404
+
+
+class TestUpdateValidation:
+    """Test rejected updates"""
+
+    def test_null_for_required_column(self, client: TestClient, auth_headers):
+        """Test that explicit nulls for required columns are rejected"""
+        category = client.post("/expenses/categories/", json={"name": "Food"}, headers=auth_headers).json()
+        account = client.post("/accounts/", json={"account_number": "HR001"}, headers=auth_headers).json()
+
+        category_response = client.put(
+            f"/expenses/categories/{category['id']}", json={"name": None}, headers=auth_headers
+        )
+        account_response = client.put(
+            f"/accounts/{account['id']}", json={"account_number": None}, headers=auth_headers
+        )
+
+        assert category_response.status_code == 422
+        assert account_response.status_code == 422
+
+    def test_null_for_optional_column(self, client: TestClient, auth_headers):
+        """Test that nullable columns can still be cleared"""
+        category = client.post(
+            "/expenses/categories/", json={"name": "Food", "description": "Groceries"}, headers=auth_headers
+        ).json()
+
+        response = client.put(
+            f"/expenses/categories/{category['id']}", json={"description": None}, headers=auth_headers
+        )
+
+        assert response.status_code == 200
+        assert response.json()["description"] is None
+
+    def test_account_field_limits(self, client: TestClient, auth_headers):
+        """Test that updates keep the column length limits"""
+        account = client.post("/accounts/", json={"account_number": "HR001"}, headers=auth_headers).json()
+
+        number = client.put(f"/accounts/{account['id']}", json={"account_number": "1" * 40}, headers=auth_headers)
+        nickname = client.put(f"/accounts/{account['id']}", json={"account_nickname": "n" * 201}, headers=auth_headers)
+
+        assert number.status_code == 422
+        assert nickname.status_code == 422
+
+    def test_duplicate_account_number(self, client: TestClient, auth_headers):
+        """Test that taking another account's number returns a conflict"""
+        client.post("/accounts/", json={"account_number": "HR001"}, headers=auth_headers)
+        account = client.post("/accounts/", json={"account_number": "HR002"}, headers=auth_headers).json()
+
+        response = client.put(
+            f"/accounts/{account['id']}", json={"account_number": "HR001"}, headers=auth_headers
+        )
+
+        assert response.status_code == 409
+        assert client.get(f"/accounts/{account['id']}", headers=auth_headers).json()["account_number"] == "HR002"
@@ -0,0 +1,165 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.core.currency import convert_totals, exchange_rates, import_exchange_rates
+from app.models.exchange_rates import ExchangeRate
+
+
+@pytest.fixture(autouse=True)
+def reset_exchange_rates():
+    exchange_rates.invalidate()
+    yield
+    exchange_rates.invalidate()
+
+
+@pytest.fixture(name="rates_file")
+def rates_file_fixture(tmp_path):
+    path = tmp_path / "rates.csv"
+    path.write_text(
+        "date,currency,rate\n"
+        "2024-01-02,USD,1.1000\n"
+        "2024-02-01,USD,1.0800\n"
+        "2024-02-01,GBP,0.8500\n"
+    )
+    return path
+
+
+class TestExchangeRateImport:
+    """Test importing the exchange-rate table from a file"""
+
+    def test_import_rates(self, session: Session, rates_file):
+        """Test that rates are stored and re-imports overwrite them"""
+        assert import_exchange_rates(session, rates_file) == 3
+        assert import_exchange_rates(session, rates_file) == 3
+
+        rates = session.exec(select(ExchangeRate)).all()
+        assert len(rates) == 3
+
+    def test_rates_on_uses_latest_earlier_date(self, session: Session, rates_file):
+        """Test that lookups fall back to the latest published rates"""
+        import_exchange_rates(session, rates_file)
+        exchange_rates.ensure_loaded(session)
+
+        rate_date, rates = exchange_rates.rates_on(date(2024, 1, 20))
+
+        assert rate_date == date(2024, 1, 2)
+        assert rates["USD"] == Decimal("1.1000")
+        assert "GBP" not in rates
+
+
+    def test_rejects_non_positive_rates(self, session: Session, tmp_path):
+        """Test that zero or negative rates are refused before importing"""
+        path = tmp_path / "bad.csv"
+        path.write_text("date,currency,rate\n2024-01-02,USD,1.1\n2024-01-02,GBP,0\n")
+
+        with pytest.raises(ValueError, match="line 3"):
+            import_exchange_rates(session, path)
+        assert session.exec(select(ExchangeRate)).all() == []
+
+    def test_cache_reloads_after_max_age(self, session: Session, rates_file):
+        """Test that rates imported elsewhere show up once the cache expires"""
+        exchange_rates.ensure_loaded(session)
+        session.add(ExchangeRate(rate_date=date(2024, 1, 2), currency="CHF", rate=Decimal("0.95")))
+        session.commit()
+
+        exchange_rates.ensure_loaded(session)
+        assert "CHF" not in exchange_rates.rates_on(date(2024, 1, 2))[1]
+
+        max_age = exchange_rates.max_age_seconds
+        exchange_rates.max_age_seconds = 0
+        try:
+            exchange_rates.ensure_loaded(session)
+        finally:
+            exchange_rates.max_age_seconds = max_age
+        assert exchange_rates.rates_on(date(2024, 1, 2))[1]["CHF"] == Decimal("0.95")
+
+
+class TestConversion:
+    """Test bulk currency conversion"""
+
+    def test_convert_totals(self):
+        """Test converting per-currency totals including legacy HRK"""
+        rates = {"EUR": Decimal(1), "USD": Decimal("1.1"), "HRK": Decimal("7.53450")}
+        totals = {"EUR": Decimal("10"), "USD": Decimal("11"), "HRK": Decimal("75.345")}
+
+        converted = convert_totals(totals, "EUR", rates)
+
+        assert converted == {"EUR": Decimal("10.00"), "USD": Decimal("10.00"), "HRK": Decimal("10.00")}
+
+    def test_missing_rate(self):
+        """Test that an unknown currency is reported"""
+        with pytest.raises(ValueError, match="JPY"):
+            convert_totals({"JPY": Decimal("100")}, "EUR", {"EUR": Decimal(1)})
+
+
+class TestNetWorth:
+    """Test the net worth report"""
+
+    def test_net_worth_across_currencies(self, client: TestClient, auth_headers, session: Session, rates_file):
+        """Test that balances in several currencies are summed in one currency"""
+        import_exchange_rates(session, rates_file)
+        for number, balance, currency in (
+            ("EUR-1", "100.00", "EUR"),
+            ("EUR-2", "50.00", "EUR"),
+            ("USD-1", "108.00", "USD"),
+            ("HRK-1", "753.45", "HRK"),
+        ):
+            response = client.post(
+                "/accounts/",
+                json={"account_number": number, "balance": balance, "currency": currency},
+                headers=auth_headers,
+            )
+            assert response.status_code == 200
+
+        response = client.get("/accounts/net-worth?on=2024-03-01", headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["rate_date"] == "2024-02-01"
+        assert Decimal(data["total"]) == Decimal("350.00")
+        assert [item["currency"] for item in data["by_currency"]] == ["EUR", "HRK", "USD"]
+
+    def test_net_worth_unknown_target_currency(self, client: TestClient, auth_headers):
+        """Test requesting a currency without rates"""
+        response = client.get("/accounts/net-worth?currency=JPY", headers=auth_headers)
+        assert response.status_code == 422
+
+    def test_admin_upload(self, client: TestClient, auth_headers, session: Session, test_user, rates_file):
+        """Test importing rates through the running server"""
+        test_user.is_admin = True
+        session.add(test_user)
+        session.commit()
+
+        with open(rates_file, "rb") as file:
+            response = client.post(
+                "/admin/exchange-rates", files={"file": ("rates.csv", file, "text/csv")}, headers=auth_headers
+            )
+        bad = client.post(
+            "/admin/exchange-rates",
+            files={"file": ("bad.csv", b"date,currency,rate\n2024-01-02,USD,-1\n", "text/csv")},
+            headers=auth_headers,
+        )
+
+        not_utf8 = client.post(
+            "/admin/exchange-rates",
+            files={"file": ("latin1.csv", "date,currency,rate\n2024-01-02,USD,1.1 \xe9\n".encode("latin-1"), "text/csv")},
+            headers=auth_headers,
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {"imported": 3}
+        assert bad.status_code == 422
+        assert not_utf8.status_code == 422
+        net_worth = client.get("/accounts/net-worth?currency=USD&on=2024-01-05", headers=auth_headers)
+        assert net_worth.json()["rate_date"] == "2024-01-02"
+
+    def test_invalid_account_currency(self, client: TestClient, auth_headers):
+        """Test that account currencies must be ISO 4217 codes"""
+        response = client.post(
+            "/accounts/", json={"account_number": "X-1", "currency": "euro"}, headers=auth_headers
+        )
+        assert response.status_code == 422
@@ -0,0 +1,113 @@
+import pytest
+from fastapi import FastAPI, Depends
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.cache import cache_control
+from app.core.compression import CompressionMiddleware
+
+
+def create_streaming_app():
+    streaming_app = FastAPI()
+    streaming_app.add_middleware(CompressionMiddleware, minimum_size=10)
+
+    @streaming_app.get("/stream")
+    def stream():
+        return StreamingResponse((b"chunk-%d," % i for i in range(100)), media_type="text/plain")
+
+    return streaming_app
+
+
+class TestCompression:
+    """Test response compression middleware"""
+
+    def test_large_response_is_gzipped(self, client: TestClient, auth_headers):
+        """Test that list responses above the threshold are compressed"""
+        for i in range(20):
+            client.post("/expenses/categories/", json={"name": f"Category {i}"}, headers=auth_headers)
+
+        response = client.get(
+            "/expenses/categories/", headers={**auth_headers, "Accept-Encoding": "gzip"}
+        )
+
+        assert response.status_code == 200
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert len(response.json()) == 20
+
+    def test_small_response_is_not_compressed(self, client: TestClient, auth_headers):
+        """Test that responses below the threshold are sent as is"""
+        response = client.get(
+            "/expenses/categories/", headers={**auth_headers, "Accept-Encoding": "gzip"}
+        )
+
+        assert response.status_code == 200
+        assert "Content-Encoding" not in response.headers
+
+    def test_brotli_preferred(self, client: TestClient, auth_headers):
+        """Test that brotli is used when the client accepts it"""
+        pytest.importorskip("brotli")
+        for i in range(20):
+            client.post("/expenses/categories/", json={"name": f"Category {i}"}, headers=auth_headers)
+
+        response = client.get(
+            "/expenses/categories/", headers={**auth_headers, "Accept-Encoding": "gzip, br"}
+        )
+
+        assert response.headers["Content-Encoding"] == "br"
+        assert len(response.json()) == 20
+
+    def test_rejected_encoding_is_skipped(self):
+        """Test that encodings with q=0 are not used"""
+        client = TestClient(create_streaming_app())
+        response = client.get("/stream", headers={"Accept-Encoding": "br;q=0, gzip"})
+
+        assert response.headers["Content-Encoding"] == "gzip"
+
+    def test_streaming_response_is_compressed(self):
+        """Test that streaming responses are compressed chunk by chunk"""
+        client = TestClient(create_streaming_app())
+        response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Content-Length" not in response.headers
+        assert response.text.startswith("chunk-0,chunk-1,")
+
+
+class TestCacheControl:
+    """Test per-route Cache-Control policies"""
+
+    def test_cache_control_directives(self):
+        """Test building the Cache-Control header value"""
+        policy_app = FastAPI()
+
+        @policy_app.get("/cached", dependencies=[Depends(cache_control(max_age=30, stale_while_revalidate=120))])
+        def cached():
+            return {"ok": True}
+
+        response = TestClient(policy_app).get("/cached")
+        assert response.headers["Cache-Control"] == "private, max-age=30, stale-while-revalidate=120"
+
+    def test_list_routes_declare_policy(self, client: TestClient, auth_headers):
+        """Test that list endpoints send a private cache policy"""
+        categories = client.get("/expenses/categories/", headers=auth_headers)
+        accounts = client.get("/accounts/", headers=auth_headers)
+
+        assert categories.headers["Cache-Control"].startswith("private, max-age=")
+        assert "stale-while-revalidate=" in accounts.headers["Cache-Control"]
+
+    def test_vary_lists_each_header_once(self, client: TestClient, auth_headers):
+        """Test that cache and compression headers do not duplicate Vary entries"""
+        for i in range(20):
+            client.post("/expenses/categories/", json={"name": f"Category {i}"}, headers=auth_headers)
+
+        response = client.get("/expenses/categories/", headers={**auth_headers, "Accept-Encoding": "gzip"})
+
+        assert response.headers["Vary"] == "Authorization, Accept-Encoding"
+
+    def test_errors_are_not_cached(self, client: TestClient, auth_headers):
+        """Test that error responses do not get a cache policy"""
+        response = client.get("/expenses/categories/999", headers=auth_headers)
+
+        assert response.status_code == 404
+        assert "Cache-Control" not in response.headers
+
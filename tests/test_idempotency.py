@@ -0,0 +1,191 @@
+import asyncio
+import uuid
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.core.auth import create_access_token
+from app.core.idempotency import (
+    IdempotencyBackend,
+    IdempotencyMiddleware,
+    IdempotencyRecord,
+    InMemoryIdempotencyStore,
+)
+from app.models.accounts import Account
+from app.models.expense_categories import ExpensesCategory
+
+
+class TestInMemoryIdempotencyStore:
+    """Test the bounded in-process idempotency store"""
+
+    def test_add_only_once(self):
+        """Test that a key can only be claimed once"""
+        store = InMemoryIdempotencyStore()
+
+        assert store.add("key", IdempotencyRecord(fingerprint="a")) is True
+        assert store.add("key", IdempotencyRecord(fingerprint="b")) is False
+        assert store.get("key").fingerprint == "a"
+
+    def test_evicts_oldest_entries(self):
+        """Test that the store never grows beyond max_entries"""
+        store = InMemoryIdempotencyStore(max_entries=2)
+        for key in ("a", "b", "c"):
+            store.set(key, IdempotencyRecord(fingerprint=key))
+
+        assert len(store) == 2
+        assert store.get("a") is None
+        assert store.get("c") is not None
+
+    def test_incomplete_backend_cannot_be_created(self):
+        """Test that a backend missing methods fails on creation"""
+        class GetOnlyBackend(IdempotencyBackend):
+            def get(self, key):
+                return None
+
+        with pytest.raises(TypeError):
+            GetOnlyBackend()
+
+    def test_expired_entries_are_dropped(self):
+        """Test that entries expire after the TTL"""
+        store = InMemoryIdempotencyStore(ttl_seconds=0)
+        store.set("key", IdempotencyRecord(fingerprint="a"))
+
+        assert store.get("key") is None
+
+
+class TestIdempotentPosts:
+    """Test Idempotency-Key handling on POST routes"""
+
+    def test_retry_returns_stored_response(self, client: TestClient, auth_headers, session: Session):
+        """Test that a retried create does not insert a duplicate"""
+        headers = {**auth_headers, "Idempotency-Key": str(uuid.uuid4())}
+
+        first = client.post("/expenses/categories/", json={"name": "Travel"}, headers=headers)
+        second = client.post("/expenses/categories/", json={"name": "Travel"}, headers=headers)
+
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert second.json() == first.json()
+        assert second.headers["Idempotent-Replayed"] == "true"
+        assert len(session.exec(select(ExpensesCategory)).all()) == 1
+
+    def test_retry_account_creation(self, client: TestClient, auth_headers, session: Session):
+        """Test that a retried account creation is replayed"""
+        headers = {**auth_headers, "Idempotency-Key": str(uuid.uuid4())}
+        payload = {"account_number": "HR789"}
+
+        first = client.post("/accounts/", json=payload, headers=headers)
+        second = client.post("/accounts/", json=payload, headers=headers)
+
+        assert first.status_code == 200
+        assert second.json()["id"] == first.json()["id"]
+        assert len(session.exec(select(Account)).all()) == 1
+
+    def test_key_reuse_with_different_payload(self, client: TestClient, auth_headers):
+        """Test that reusing a key for a different request is rejected"""
+        headers = {**auth_headers, "Idempotency-Key": str(uuid.uuid4())}
+
+        client.post("/expenses/categories/", json={"name": "Gifts"}, headers=headers)
+        response = client.post("/expenses/categories/", json={"name": "Other"}, headers=headers)
+
+        assert response.status_code == 422
+
+    def test_requests_without_key_are_not_deduplicated(self, client: TestClient, auth_headers, session: Session):
+        """Test that POSTs without a key behave as before"""
+        client.post("/expenses/categories/", json={"name": "Fuel"}, headers=auth_headers)
+        client.post("/expenses/categories/", json={"name": "Fuel"}, headers=auth_headers)
+
+        assert len(session.exec(select(ExpensesCategory)).all()) == 2
+
+    def test_auth_routes_are_not_stored(self, client: TestClient, test_user):
+        """Test that login responses carrying tokens are never replayed"""
+        headers = {"Idempotency-Key": str(uuid.uuid4())}
+        credentials = {"username": "test@example.com", "password": "testpassword123"}
+
+        client.post("/auth/token", data=credentials, headers=headers)
+        response = client.post("/auth/token", data=credentials, headers=headers)
+
+        assert response.status_code == 200
+        assert "Idempotent-Replayed" not in response.headers
+
+    def test_anonymous_requests_are_not_stored(self, client: TestClient):
+        """Test that requests without a bearer token bypass the store"""
+        headers = {"Idempotency-Key": str(uuid.uuid4())}
+
+        client.post("/expenses/categories/", json={"name": "Anon"}, headers=headers)
+        response = client.post("/expenses/categories/", json={"name": "Anon"}, headers=headers)
+
+        assert "Idempotent-Replayed" not in response.headers
+
+    def test_invalid_token_is_not_stored(self):
+        """Test that a forged bearer token cannot claim store entries"""
+        store = InMemoryIdempotencyStore()
+        middleware = IdempotencyMiddleware(reply_app(200), backend=store)
+
+        asyncio.run(call(middleware, "Bearer junk"))
+
+        assert len(store) == 0
+
+    def test_key_survives_token_refresh(self, client: TestClient, test_user, session: Session):
+        """Test that a retry with a refreshed token still replays"""
+        key = str(uuid.uuid4())
+        first_token = create_access_token({"sub": test_user.email}, timedelta(minutes=30))
+        second_token = create_access_token({"sub": test_user.email}, timedelta(minutes=31))
+
+        client.post(
+            "/expenses/categories/", json={"name": "Retry"},
+            headers={"Authorization": f"Bearer {first_token}", "Idempotency-Key": key},
+        )
+        response = client.post(
+            "/expenses/categories/", json={"name": "Retry"},
+            headers={"Authorization": f"Bearer {second_token}", "Idempotency-Key": key},
+        )
+
+        assert response.headers["Idempotent-Replayed"] == "true"
+        assert len(session.exec(select(ExpensesCategory)).all()) == 1
+
+    def test_cancelled_request_frees_key(self):
+        """Test that a cancelled request does not leave a pending record"""
+        store = InMemoryIdempotencyStore()
+
+        async def cancelled_app(scope, receive, send):
+            raise asyncio.CancelledError()
+
+        middleware = IdempotencyMiddleware(cancelled_app, backend=store)
+        token = create_access_token({"sub": "test@example.com"})
+
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(call(middleware, f"Bearer {token}"))
+
+        assert len(store) == 0
+
+
+def reply_app(status_code: int):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": status_code, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    return app
+
+
+async def call(middleware: IdempotencyMiddleware, authorization: str):
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/expenses/categories/",
+        "query_string": b"",
+        "headers": [
+            (b"authorization", authorization.encode()),
+            (b"idempotency-key", b"key-1"),
+        ],
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"{}", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await middleware(scope, receive, send)
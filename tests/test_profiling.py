@@ -0,0 +1,249 @@
+import asyncio
+import sys
+import time
+from collections import Counter
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.profiling import (
+    TRUNCATED_STACK,
+    UNMATCHED_ROUTE,
+    Profile,
+    ProfileCollector,
+    ProfileStore,
+    ProfilingSettings,
+    SamplingProfiler,
+    profile_store,
+    profiling_settings,
+    ProfilingMiddleware,
+    collapse_stack,
+)
+from app.models.auth import UserInDB
+
+
+@pytest.fixture(autouse=True)
+def reset_profiling():
+    yield
+    profiling_settings.enabled = False
+    profiling_settings.sample_rate = 0.0
+    profiling_settings.header_token = None
+    profile_store.clear()
+
+
+@pytest.fixture(name="admin_headers")
+def admin_headers_fixture(session: Session, test_user: UserInDB, auth_headers):
+    """Promote the test user to admin"""
+    test_user.is_admin = True
+    session.add(test_user)
+    session.commit()
+    return auth_headers
+
+
+TOKEN = "profile-token-0123456789"
+
+
+def make_profile(profile_id: str, route: str = "/accounts/") -> Profile:
+    return Profile(
+        id=profile_id, route=route, method="GET", status_code=200,
+        duration_ms=1.0, samples=1, stacks=Counter({"main;handler": 2}),
+    )
+
+
+class TestProfileStore:
+    """Test bounded retention of profiles"""
+
+    def test_keeps_latest_profiles_per_route(self):
+        """Test that old profiles of a route are dropped"""
+        store = ProfileStore(max_profiles_per_route=2)
+        for profile_id in ("a", "b", "c"):
+            store.add(make_profile(profile_id))
+
+        assert [profile.id for profile in store.list()] == ["b", "c"]
+
+    def test_limits_number_of_routes(self):
+        """Test that the least recently profiled route is dropped"""
+        store = ProfileStore(max_routes=1)
+        store.add(make_profile("a", "/accounts/"))
+        store.add(make_profile("b", "/expenses/categories/"))
+
+        assert [profile.route for profile in store.list()] == ["/expenses/categories/"]
+
+    def test_collapsed_output(self):
+        """Test the flamegraph-compatible output"""
+        assert make_profile("a").collapsed() == "main;handler 2\n"
+
+
+class TestSamplingProfiler:
+    """Test the stack sampler"""
+
+    def test_sample_records_stacks(self):
+        """Test that a sample records the calling thread's stack"""
+        collector = ProfileCollector(max_stacks=100)
+        collector.add([collapse_stack(sys._getframe())])
+
+        assert collector.samples == 1
+        assert any("test_sample_records_stacks" in stack for stack in collector.stacks)
+
+    def test_stacks_are_capped(self):
+        """Test that distinct stacks beyond the cap are merged"""
+        collector = ProfileCollector(max_stacks=2)
+        collector.add(["a", "b", "c", "d", "a"])
+
+        assert collector.stacks == {"a": 2, "b": 1, TRUNCATED_STACK: 2}
+
+    def test_concurrent_profiles_are_capped(self):
+        """Test that only max_concurrent_profiles requests are profiled at once"""
+        profiler = SamplingProfiler(ProfilingSettings(max_concurrent_profiles=1, interval_ms=1))
+
+        first = profiler.begin()
+        assert first is not None
+        assert profiler.begin() is None
+
+        profiler.end(first)
+        second = profiler.begin()
+        assert second is not None
+        profiler.end(second)
+
+
+class TestProfilingEndpoints:
+    """Test the admin-guarded profiling toggle"""
+
+    def test_requires_admin(self, client: TestClient, auth_headers):
+        """Test that regular users cannot change profiling"""
+        response = client.put("/admin/profiling", json={"enabled": True}, headers=auth_headers)
+        assert response.status_code == 403
+
+    def test_disabled_by_default(self, client: TestClient, admin_headers):
+        """Test that the profile header is ignored while profiling is off"""
+        profiling_settings.header_token = TOKEN
+        client.get("/accounts/", headers={**admin_headers, "X-Profile": TOKEN})
+
+        assert client.get("/admin/profiles", headers=admin_headers).json() == []
+
+    def test_profile_request_with_header(self, client: TestClient, admin_headers):
+        """Test profiling a request that carries the admin's profile token"""
+        response = client.put(
+            "/admin/profiling",
+            json={"enabled": True, "interval_ms": 1, "header_token": TOKEN},
+            headers=admin_headers,
+        )
+        assert response.status_code == 200
+        assert response.json()["enabled"] is True
+        assert response.json()["header_token_set"] is True
+        assert "header_token" not in response.json()
+
+        client.get("/accounts/", headers={**admin_headers, "X-Profile": TOKEN})
+        client.get("/accounts/", headers=admin_headers)
+
+        profiles = client.get("/admin/profiles", headers=admin_headers).json()
+        assert len(profiles) == 1
+        assert profiles[0]["route"] == "/accounts/"
+        assert profiles[0]["method"] == "GET"
+
+        output = client.get(f"/admin/profiles/{profiles[0]['id']}", headers=admin_headers)
+        assert output.status_code == 200
+        assert output.headers["content-type"].startswith("text/plain")
+
+    def test_header_needs_token(self, client: TestClient, admin_headers, auth_headers):
+        """Test that anyone without the token cannot force profiling"""
+        client.put("/admin/profiling", json={"enabled": True, "header_token": TOKEN}, headers=admin_headers)
+
+        client.get("/accounts/", headers={**auth_headers, "X-Profile": "1"})
+        client.get("/nonexistent-route-xyz", headers={"X-Profile": "wrong-token-value"})
+
+        assert profile_store.list() == []
+
+    def test_unmatched_routes_share_a_bucket(self, client: TestClient, admin_headers):
+        """Test that unknown paths do not each take a route slot"""
+        client.put("/admin/profiling", json={"enabled": True, "header_token": TOKEN}, headers=admin_headers)
+
+        client.get("/missing-a", headers={"X-Profile": TOKEN})
+        client.get("/missing-b", headers={"X-Profile": TOKEN})
+
+        assert {profile.route for profile in profile_store.list()} == {UNMATCHED_ROUTE}
+
+    def test_sample_rate(self, client: TestClient, admin_headers):
+        """Test that a sample rate of 1 profiles every request"""
+        client.put("/admin/profiling", json={"enabled": True, "sample_rate": 1}, headers=admin_headers)
+        client.get("/accounts/", headers=admin_headers)
+
+        assert len(profile_store.list()) >= 1
+
+    def test_null_settings_are_rejected(self, client: TestClient, admin_headers):
+        """Test that a null setting is refused and nothing is changed"""
+        response = client.put(
+            "/admin/profiling", json={"enabled": True, "sample_rate": None}, headers=admin_headers
+        )
+
+        assert response.status_code == 422
+        assert profiling_settings.enabled is False
+        assert profiling_settings.sample_rate == 0.0
+        assert client.get("/accounts/", headers=admin_headers).status_code == 200
+
+    def test_header_token_can_be_cleared(self, client: TestClient, admin_headers):
+        """Test that the header token accepts null to disable header profiling"""
+        profiling_settings.header_token = TOKEN
+        response = client.put("/admin/profiling", json={"header_token": None}, headers=admin_headers)
+
+        assert response.status_code == 200
+        assert response.json()["header_token_set"] is False
+
+    def test_invalid_sample_rate(self, client: TestClient, admin_headers):
+        """Test that the sample rate must be a fraction"""
+        response = client.put("/admin/profiling", json={"sample_rate": 2}, headers=admin_headers)
+        assert response.status_code == 422
+
+
+def busy_wait(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def profiled_work() -> None:
+    busy_wait(0.3)
+
+
+def other_work() -> None:
+    busy_wait(0.3)
+
+
+class TestRequestAttribution:
+    """Test that profiles only contain the profiled request's threads"""
+
+    def test_concurrent_request_is_excluded(self):
+        """Test two concurrent sync requests where only one is profiled"""
+        settings = ProfilingSettings(enabled=True, interval_ms=1, header_token=TOKEN)
+        store = ProfileStore()
+        test_app = FastAPI()
+        test_app.add_middleware(ProfilingMiddleware, settings=settings, store=store, profiler=SamplingProfiler(settings))
+
+        @test_app.get("/profiled")
+        def profiled():
+            profiled_work()
+            return {"ok": True}
+
+        @test_app.get("/other")
+        def other():
+            other_work()
+            return {"ok": True}
+
+        async def run_requests():
+            transport = httpx.ASGITransport(app=test_app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+                await asyncio.gather(
+                    async_client.get("/profiled", headers={"X-Profile": TOKEN}),
+                    async_client.get("/other"),
+                )
+
+        asyncio.run(run_requests())
+
+        [profile] = store.list()
+        stacks = profile.collapsed()
+        assert profile.route == "/profiled"
+        assert "profiled_work" in stacks
+        assert "other_work" not in stacks
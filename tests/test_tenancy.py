@@ -0,0 +1,86 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.core.auth import create_access_token, get_password_hash
+from app.core.tenancy import TENANT_KEY
+from app.models.accounts import Account
+from app.models.auth import UserInDB
+from app.models.expense_categories import ExpensesCategory
+
+
+@pytest.fixture(name="other_headers")
+def other_headers_fixture(session: Session):
+    """Create a second user and return their authorization headers"""
+    user = UserInDB(
+        email="other@example.com",
+        first_name="Other",
+        last_name="User",
+        hashed_password=get_password_hash("otherpassword123")
+    )
+    session.add(user)
+    session.commit()
+    token = create_access_token({"sub": user.email})
+    return {"Authorization": f"Bearer {token}"}
+
+
+class TestTenantSession:
+    """Test automatic user scoping of sessions"""
+
+    def test_queries_are_scoped(self, session: Session, test_user: UserInDB):
+        """Test that a tenant session only sees rows of its user"""
+        session.add(Account(account_number="A-1", user_id=test_user.id))
+        session.add(Account(account_number="A-2", user_id=test_user.id + 1))
+        session.commit()
+
+        session.info[TENANT_KEY] = test_user.id
+        try:
+            accounts = session.exec(select(Account)).all()
+        finally:
+            session.info.pop(TENANT_KEY)
+
+        assert [account.account_number for account in accounts] == ["A-1"]
+        assert len(session.exec(select(Account)).all()) == 2
+
+    def test_new_rows_get_tenant(self, session: Session, test_user: UserInDB):
+        """Test that new rows are assigned to the tenant"""
+        session.info[TENANT_KEY] = test_user.id
+        try:
+            category = ExpensesCategory(name="Pets")
+            session.add(category)
+            session.commit()
+        finally:
+            session.info.pop(TENANT_KEY)
+
+        assert category.user_id == test_user.id
+
+
+class TestUserScopedCategories:
+    """Test that categories belong to a single user"""
+
+    def test_categories_are_private(self, client: TestClient, auth_headers, other_headers):
+        """Test that users only see and change their own categories"""
+        created = client.post("/expenses/categories/", json={"name": "Mine"}, headers=auth_headers).json()
+        client.post("/expenses/categories/", json={"name": "Theirs"}, headers=other_headers)
+
+        mine = client.get("/expenses/categories/", headers=auth_headers).json()
+        assert [category["name"] for category in mine] == ["Mine"]
+
+        assert client.get(f"/expenses/categories/{created['id']}", headers=other_headers).status_code == 404
+        assert client.put(
+            f"/expenses/categories/{created['id']}", json={"name": "Stolen"}, headers=other_headers
+        ).status_code == 404
+        assert client.delete(f"/expenses/categories/{created['id']}", headers=other_headers).status_code == 404
+        assert client.get(f"/expenses/categories/{created['id']}", headers=auth_headers).json()["name"] == "Mine"
+
+    def test_accounts_are_private(self, client: TestClient, auth_headers, other_headers):
+        """Test that accounts and net worth only include the caller's rows"""
+        account = client.post(
+            "/accounts/", json={"account_number": "MINE-1", "balance": "10.00"}, headers=auth_headers
+        ).json()
+        client.post("/accounts/", json={"account_number": "THEIRS-1", "balance": "99.00"}, headers=other_headers)
+
+        assert len(client.get("/accounts/", headers=other_headers).json()) == 1
+        assert client.get(f"/accounts/{account['id']}", headers=other_headers).status_code == 404
+        net_worth = client.get("/accounts/net-worth", headers=auth_headers).json()
+        assert float(net_worth["total"]) == 10.0